@@ -12,106 +12,283 @@ Usage:
 
 import xarray as xr
 import numpy as np
+import dask
+import dask.array as da
+import h5py
 import sys
 from pathlib import Path
 
-def find_bit_pattern(data_array):
+EMPTY_PATTERN = "(MSB) -------- -------- -------- -------- (LSB)"
+
+# Number of values reduced per tile, bounding temporary memory
+REDUCE_TILE_SIZE = 1 << 20
+
+# Number of dask blocks reduced in parallel between early-exit checks
+REDUCE_BATCH_BLOCKS = 16
+
+# HDF5 chunk cache, so chunks shared by several slices are decompressed once
+CHUNK_CACHE_NBYTES = 64 << 20
+CHUNK_CACHE_NSLOTS = 5003
+
+def to_bit_view(data):
     """
-    Find the bit pattern showing which bit positions are used in a data array.
+    Reinterpret numerical data as unsigned integers for bit analysis.
     
     Args:
-        data_array: xarray DataArray with numerical data
+        data: numpy array with numerical data
         
     Returns:
-        str: Bit pattern string with '1' for used bits, '-' for unused bits
+        tuple: (unsigned integer array, bit width)
     """
-    # Convert to numpy array and handle NaN/inf values
-    data = data_array.values
-    
-    # Remove NaN and infinite values
-    valid_data = data[np.isfinite(data)]
-    
-    if len(valid_data) == 0:
-        return "(MSB) -------- -------- -------- -------- (LSB)"
-    
-    # Convert to integer representation for bit analysis
-    # For float32, we'll look at the raw bits
     if data.dtype == np.float32:
         # Convert to 32-bit integer view
-        int_data = valid_data.view(np.uint32)
+        return data.view(np.uint32), 32
     elif data.dtype == np.float64:
         # Convert to 64-bit integer view
-        int_data = valid_data.view(np.uint64)
+        return data.view(np.uint64), 64
     else:
-        # For integer types, use directly
-        int_data = valid_data.astype(np.uint64)
+        # For integer types, use directly (default to 64 bits)
+        return data.astype(np.uint64), 64
+
+def format_bit_pattern(any_set, all_set, dtype):
+    """
+    Format OR/AND reductions of a bit view as a bit pattern string.
     
-    # Find the maximum value to determine highest bit position
-    max_val = np.max(int_data)
+    Args:
+        any_set: bitwise OR of all values (bit set if any value has it)
+        all_set: bitwise AND of all values (bit set if every value has it)
+        dtype: numpy dtype of the original data
+        
+    Returns:
+        str: Bit pattern string with '0'/'1' for constant bits, '-' for mixed bits
+    """
+    any_set = int(any_set)
+    all_set = int(all_set)
     
-    if max_val == 0:
-        return "(MSB) -------- -------- -------- -------- (LSB)"
+    if any_set == 0:
+        return EMPTY_PATTERN
     
     # Determine bit width based on data type
-    if data.dtype == np.float32:
+    if dtype == np.float32:
         bit_width = 32
-    elif data.dtype == np.float64:
+    elif dtype == np.float64:
         bit_width = 64
     else:
         bit_width = 64  # Default for integer types
     
-    # Create bit pattern arrays
-    # 0: all zeros, 1: all ones, 2: mixed (some zeros, some ones)
-    bit_pattern = np.zeros(bit_width, dtype=int)
-    
-    # Check each bit position using vectorized operations
-    for bit_pos in range(bit_width):
-        # Create mask for this bit position
-        bit_mask = 1 << bit_pos
-        # Get bit values for this position across all data
-        bit_values = (int_data & bit_mask) != 0
-        
-        # Check if all zeros, all ones, or mixed
-        if np.all(bit_values == False):
-            bit_pattern[bit_pos] = 0  # All zeros
-        elif np.all(bit_values == True):
-            bit_pattern[bit_pos] = 1  # All ones
-        else:
-            bit_pattern[bit_pos] = 2  # Mixed
+    # State of each bit position, MSB first: '0' all zeros, '1' all ones,
+    # '-' mixed (some zeros, some ones)
+    all_bits = np.frombuffer(format(all_set, f'0{bit_width}b').encode(), dtype=np.uint8)
+    mixed = any_set & ~all_set
+    mixed_bits = np.frombuffer(format(mixed, f'0{bit_width}b').encode(), dtype=np.uint8) == ord('1')
+    states = np.where(mixed_bits, ord('-'), all_bits).astype(np.uint8).tobytes().decode()
     
-    # Convert to string representation (MSB first)
+    # Join the fields with IEEE 754 separators and byte spacing
     pattern_chars = []
-    for i in range(bit_width-1, -1, -1):  # Start from MSB
-        if bit_pattern[i] == 0:
-            pattern_chars.append('0')  # All zeros
-        elif bit_pattern[i] == 1:
-            pattern_chars.append('1')  # All ones
-        else:
-            pattern_chars.append('-')  # Mixed
-        
-        # Add IEEE 754 field separators for float types
-        if data.dtype == np.float32:
-            # Float32: S|EEEEEEEE|MMMMMMMMMMMMMMMMMMMMMMM
-            # Sign bit at position 31, exponent at 30-23, mantissa at 22-0
-            if i == 31:  # After sign bit (position 31)
-                pattern_chars.append('|')
-            elif i == 23:  # After exponent (positions 30-23)
-                pattern_chars.append('|')
-        elif data.dtype == np.float64:
-            # Float64: S|EEEEEEEEEEE|MMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMMM
-            # Sign bit at position 63, exponent at 62-52, mantissa at 51-0
-            if i == 63:  # After sign bit (position 63)
-                pattern_chars.append('|')
-            elif i == 52:  # After exponent (positions 62-52)
-                pattern_chars.append('|')
-        
-        # Add space every 8 bits (but not at the end, and not if we just added |)
-        if i > 0 and (bit_width - i) % 8 == 0 and (pattern_chars[-1] != '|' if pattern_chars else True):
-            pattern_chars.append(' ')
+    pos = 0
+    for length, separator in pattern_groups(dtype):
+        pattern_chars.append(states[pos:pos + length])
+        pattern_chars.append(separator)
+        pos += length
     
     pattern_str = ''.join(pattern_chars)
     return f"(MSB) {pattern_str} (LSB)"
 
+def pattern_groups(dtype):
+    """
+    Field layout of a bit pattern string, MSB first.
+    
+    Args:
+        dtype: numpy dtype of the original data
+        
+    Returns:
+        list: (number of bits, separator following them) per group
+    """
+    if dtype == np.float32:
+        # Float32: S|EEEEEEEE|MMMMMMMMMMMMMMMMMMMMMMM, spaced every 8 bits
+        return [(1, '|'), (7, ' '), (1, '|'), (7, ' '), (8, ' '), (8, '')]
+    elif dtype == np.float64:
+        # Float64: S|EEEEEEEEEEE|MMMM...M (52 bits), spaced every 8 bits
+        return [(1, '|'), (7, ' '), (4, '|'), (4, ' ')] + [(8, ' ')] * 5 + [(8, '')]
+    else:
+        # Integer types: 64 bits spaced every 8 bits
+        return [(8, ' ')] * 7 + [(8, '')]
+
+def find_bit_pattern(data_array):
+    """
+    Find the bit pattern showing which bit positions are used in a data array.
+    
+    Args:
+        data_array: xarray DataArray with numerical data
+        
+    Returns:
+        str: Bit pattern string with '1' for used bits, '-' for unused bits
+    """
+    if isinstance(data_array.data, da.Array):
+        # Stream chunks through a lazy reduction
+        any_set, all_set, has_valid = reduce_bits_dask(data_array.data)
+    else:
+        # Convert to numpy array and handle NaN/inf values
+        any_set, all_set, has_valid = reduce_bits(data_array.values)
+    
+    if not has_valid:
+        return EMPTY_PATTERN
+    
+    return format_bit_pattern(any_set, all_set, data_array.dtype)
+
+def reduce_bits(data):
+    """
+    Reduce the bits of all finite values with bitwise OR and AND, tile by tile.
+    
+    Non-finite values are replaced by the identity of each reduction (0 for
+    OR, all ones for AND) instead of being filtered out, so no compacted
+    copy of the data is made and temporary memory stays O(tile).
+    
+    The scan stops early once every bit is mixed (OR all ones, AND zero),
+    since no further value can change the pattern.
+    
+    Args:
+        data: numpy array with numerical data
+        
+    Returns:
+        tuple: (OR of all finite values, AND of all finite values, whether any value is finite)
+    """
+    flat = data.ravel()
+    any_set = 0
+    all_set = None
+    has_valid = False
+    
+    for start in range(0, flat.size, REDUCE_TILE_SIZE):
+        tile = flat[start:start + REDUCE_TILE_SIZE]
+        finite = np.isfinite(tile)
+        int_tile, _ = to_bit_view(tile)
+        all_ones = np.iinfo(int_tile.dtype).max
+        
+        any_set |= int(np.bitwise_or.reduce(np.where(finite, int_tile, 0)))
+        tile_all = int(np.bitwise_and.reduce(np.where(finite, int_tile, all_ones)))
+        all_set = tile_all if all_set is None else all_set & tile_all
+        has_valid = has_valid or bool(finite.any())
+        
+        if any_set == all_ones and all_set == 0:
+            break
+    
+    return any_set, all_set, has_valid
+
+def reduce_bits_dask(darr, axis=None):
+    """
+    Reduce the bits of all finite values of a dask array with bitwise OR and AND.
+    
+    The reductions run chunk by chunk (aligned to the file's chunks when the
+    dataset is opened with chunks={}), so only a few chunks are in memory at
+    once. The OR, AND and validity reductions share one pass over the data.
+    When reducing over all axes, blocks are reduced in batches so the scan
+    can stop early (see reduce_bits_blocks).
+    
+    Args:
+        darr: dask array with numerical data
+        axis: axes to reduce over (None for all)
+        
+    Returns:
+        tuple: (OR of finite values, AND of finite values, whether any value is finite)
+    """
+    if axis is None:
+        return reduce_bits_blocks(darr)
+    
+    bit_dtype = np.uint32 if darr.dtype == np.float32 else np.uint64
+    all_ones = np.iinfo(bit_dtype).max
+    
+    finite = da.isfinite(darr)
+    int_data = darr.map_blocks(lambda block: to_bit_view(block)[0], dtype=bit_dtype)
+    
+    any_set = da.reduction(da.where(finite, int_data, bit_dtype(0)),
+                           np.bitwise_or.reduce, np.bitwise_or.reduce,
+                           axis=axis, dtype=bit_dtype)
+    all_set = da.reduction(da.where(finite, int_data, bit_dtype(all_ones)),
+                           np.bitwise_and.reduce, np.bitwise_and.reduce,
+                           axis=axis, dtype=bit_dtype)
+    has_valid = finite.any(axis=axis)
+    
+    return dask.compute(any_set, all_set, has_valid)
+
+def reduce_bits_blocks(darr):
+    """
+    Reduce the bits of all finite values of a dask array, batch of blocks by
+    batch of blocks.
+    
+    Each batch of blocks is reduced in parallel with reduce_bits, and the
+    scan stops once every bit is mixed (OR all ones, AND zero), so the
+    remaining blocks are never read.
+    
+    Args:
+        darr: dask array with numerical data
+        
+    Returns:
+        tuple: (OR of finite values, AND of finite values, whether any value is finite)
+    """
+    bit_dtype = np.uint32 if darr.dtype == np.float32 else np.uint64
+    all_ones = np.iinfo(bit_dtype).max
+    blocks = darr.to_delayed().ravel()
+    
+    any_set = 0
+    all_set = None
+    has_valid = False
+    
+    for start in range(0, len(blocks), REDUCE_BATCH_BLOCKS):
+        batch = [dask.delayed(reduce_bits)(block) for block in blocks[start:start + REDUCE_BATCH_BLOCKS]]
+        for block_any, block_all, block_valid in dask.compute(*batch):
+            # Blocks without finite values do not affect either reduction
+            if not block_valid:
+                continue
+            any_set |= block_any
+            all_set = block_all if all_set is None else all_set & block_all
+            has_valid = True
+        
+        if any_set == all_ones and all_set == 0:
+            break
+    
+    return any_set, all_set, has_valid
+
+def find_slice_bit_patterns(data_var):
+    """
+    Find the bit pattern of every 2D slice (last two dimensions) of a 3D+ variable.
+    
+    All slices are reduced together along the trailing axes (chunk by chunk
+    for dask-backed variables), instead of indexing and reducing slice by slice.
+    Non-finite values are replaced by the identity of each reduction
+    (0 for OR, all ones for AND) so they do not affect the result.
+    
+    Args:
+        data_var: xarray DataArray with at least 3 dimensions
+        
+    Returns:
+        list: (leading indices, bit pattern string) per 2D slice
+    """
+    leading_dims = data_var.shape[:-2]
+    
+    if isinstance(data_var.data, da.Array):
+        # Stream chunks through a lazy reduction over the last two axes
+        any_set, all_set, has_valid = reduce_bits_dask(data_var.data, axis=(-2, -1))
+    else:
+        data = data_var.values
+        int_data, _ = to_bit_view(data)
+        finite = np.isfinite(data).reshape(*leading_dims, -1)
+        int_data = int_data.reshape(*leading_dims, -1)
+        all_ones = np.iinfo(int_data.dtype).max
+        
+        any_set = np.bitwise_or.reduce(np.where(finite, int_data, 0), axis=-1)
+        all_set = np.bitwise_and.reduce(np.where(finite, int_data, all_ones), axis=-1)
+        has_valid = finite.any(axis=-1)
+    
+    patterns = []
+    for indices in np.ndindex(*leading_dims):
+        if has_valid[indices]:
+            bit_pattern = format_bit_pattern(any_set[indices], all_set[indices], data_var.dtype)
+        else:
+            bit_pattern = EMPTY_PATTERN
+        patterns.append((indices, bit_pattern))
+    
+    return patterns
+
 def analyze_netcdf_precision(filepath):
     """
     Analyze bit precision requirements for all data variables in NetCDF file.
@@ -122,8 +299,15 @@ def analyze_netcdf_precision(filepath):
     print(f"Loading NetCDF file: {filepath}")
     
     try:
-        # Load the dataset
-        ds = xr.open_dataset(filepath)
+        # Open the dataset lazily, with dask chunks matching the file's chunks
+        # and, for NetCDF-4 (HDF5) files, a larger HDF5 chunk cache on the one
+        # shared file handle; NetCDF-3 files use the default engine
+        if h5py.is_hdf5(filepath):
+            ds = xr.open_dataset(filepath, engine='h5netcdf', chunks={},
+                                 driver_kwds={'rdcc_nbytes': CHUNK_CACHE_NBYTES,
+                                              'rdcc_nslots': CHUNK_CACHE_NSLOTS})
+        else:
+            ds = xr.open_dataset(filepath, chunks={})
         
         print(f"Dataset contains {len(ds.data_vars)} data variables")
         print("-" * 120)
@@ -145,20 +329,11 @@ def analyze_netcdf_precision(filepath):
                 print(f"{var_name} (3D+)")
                 print(f"{'  Slice':<43} {shape_str:<20} {'Bit Pattern (MSB->LSB)':<50}")
                 
-                # Get the shape of the leading dimensions (all except last 2)
-                leading_dims = data_var.shape[:-2]
                 slice_shape = data_var.shape[-2:]  # Last 2 dimensions
                 slice_shape_str = "x".join(map(str, slice_shape))
                 
-                # Generate all combinations of indices for leading dimensions
-                import itertools
-                for indices in itertools.product(*[range(dim) for dim in leading_dims]):
-                    # Create slice for this combination
-                    slice_data = data_var[indices]
-                    
-                    # Find bit pattern for this slice
-                    bit_pattern = find_bit_pattern(slice_data)
-                    
+                # Find bit patterns for all slices at once
+                for indices, bit_pattern in find_slice_bit_patterns(data_var):
                     # Create slice identifier
                     slice_id = "[" + ",".join(map(str, indices)) + ",:,:]"
                     
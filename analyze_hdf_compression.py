@@ -2,7 +2,7 @@
 """
 NetCDF Compression Analysis Script
 
-This script analyzes NetCDF files compressed with HDF5 filters using h5ls,
+This script analyzes NetCDF files compressed with HDF5 filters using h5py,
 extracts storage information, and generates a summary table of disk space
 usage by variable.
 
@@ -10,67 +10,39 @@ Usage:
     python analyze_netcdf_compression.py <netcdf_file>
 """
 
-import subprocess
 import sys
-import re
 from pathlib import Path
 
-def run_h5ls(filepath):
-    """Run h5ls -rv on the NetCDF file and return output."""
-    try:
-        # Need to source Spack environment first
-        cmd = [
-            'bash', '-c', 
-            f'source /capstor/scratch/cscs/lhuang/spack/share/spack/setup-env.sh && '
-            f'export SPACK_USER_CONFIG_PATH=/capstor/scratch/cscs/lhuang/.spack && '
-            f'spack load hdf5 && h5ls -rv "{filepath}"'
-        ]
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        return result.stdout.decode('utf-8')
-    except subprocess.CalledProcessError as e:
-        print(f"Error running h5ls: {e}")
-        print(f"stderr: {e.stderr}")
-        sys.exit(1)
+import h5py
 
-def parse_h5ls_output(output):
-    """Parse h5ls output to extract variable storage information."""
+def read_storage_info(filepath):
+    """Walk the NetCDF/HDF5 file with h5py and collect variable storage information."""
     variables = []
-    current_var = None
     
-    lines = output.split('\n')
+    def visit(name, obj):
+        if not isinstance(obj, h5py.Dataset):
+            return
+        logical_bytes = obj.size * obj.dtype.itemsize
+        allocated_bytes = obj.id.get_storage_size()
+        # Datasets without storage (e.g. netCDF dimension scales of
+        # dimensions without a coordinate variable) hold no data
+        if allocated_bytes == 0:
+            return
+        variables.append({
+            'name': name,
+            'dimensions': ', '.join(map(str, obj.shape)),
+            'ndim': obj.ndim,
+            'logical_bytes': logical_bytes,
+            'allocated_bytes': allocated_bytes,
+            'utilization': 100.0 * logical_bytes / allocated_bytes
+        })
     
-    for line in lines:
-        line = line.strip()
-        
-        # Look for dataset declarations
-        if line.startswith('/') and 'Dataset' in line:
-            # Extract variable name and dimensions
-            parts = line.split()
-            var_name = parts[0][1:]  # Remove leading '/'
-            if '{' in line:
-                dims_str = line.split('{')[1].split('}')[0]
-                dimensions = dims_str.replace('/', '')
-            else:
-                dimensions = ""
-            
-            current_var = {
-                'name': var_name,
-                'dimensions': dimensions,
-                'logical_bytes': 0,
-                'allocated_bytes': 0,
-                'utilization': 0
-            }
-        
-        # Look for storage information
-        elif line.startswith('Storage:') and current_var:
-            # Parse: "Storage: 153659520 logical bytes, 63643236 allocated bytes, 241.44% utilization"
-            storage_match = re.search(r'(\d+) logical bytes, (\d+) allocated bytes, ([\d.]+)% utilization', line)
-            if storage_match:
-                current_var['logical_bytes'] = int(storage_match.group(1))
-                current_var['allocated_bytes'] = int(storage_match.group(2))
-                current_var['utilization'] = float(storage_match.group(3))
-                variables.append(current_var)
-                current_var = None
+    try:
+        with h5py.File(filepath, 'r') as f:
+            f.visititems(visit)
+    except OSError as e:
+        print(f"Error reading HDF5 file: {e}")
+        sys.exit(1)
     
     return variables
 
@@ -91,13 +63,13 @@ def categorize_variables(variables):
     
     for var in variables:
         name = var['name']
-        dims = var['dimensions']
+        ndim = var['ndim']
         
         if name in ['latitude', 'longitude', 'level', 'time']:
             coord_vars.append(var)
-        elif ',' in dims and dims.count(',') == 1:  # 2D data
+        elif ndim == 2:  # 2D data
             data_2d.append(var)
-        elif ',' in dims and dims.count(',') == 2:  # 3D data
+        elif ndim == 3:  # 3D data
             data_3d.append(var)
         else:
             other.append(var)
@@ -171,10 +143,9 @@ def main():
         sys.exit(1)
     
     print(f"Analyzing NetCDF file: {filepath}")
-    print("Running h5ls -rv...")
+    print("Reading storage information...")
     
-    output = run_h5ls(filepath)
-    variables = parse_h5ls_output(output)
+    variables = read_storage_info(filepath)
     
     if not variables:
         print("No variables with storage information found")
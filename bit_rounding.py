@@ -1,32 +1,74 @@
 import numpy as np
 import numba
-from numba import jit, types
+from numba import jit, prange, types
+import ctypes
 import math
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Constants
 NBITS = 32
 FLOAT_SIGN_MASK = 0x80000000
 FLOAT_SIGNIFICAND_MASK = 0x007fffff
 FLOAT_EXPONENT_MASK = 0x7f800000
+FLOAT_ABS_MASK = 0x7fffffff
 FLOAT_SIGNIFICAND_BITS = 23
 FLOAT_EXPONENT_BIAS = 127
 BIT_XPL_NBR_SGN_FLT = 23
+POPCOUNT_BLOCK_SIZE = 1 << 16
+BITROUND_TILE_SIZE = 1 << 14  # float32 values per tile (64 KiB)
 
-@jit(nopython=True)
+def load_native_library(name):
+    """Load a shared library built from src/ (next to this module or in build/)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    for directory in (here, os.path.join(here, 'build')):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            try:
+                return ctypes.CDLL(path)
+            except OSError:
+                pass
+    return None
+
+# Optional SIMD positional popcount (make libpospopcnt.so), NumPy fallback otherwise
+_pospopcnt_lib = load_native_library('libpospopcnt.so')
+if _pospopcnt_lib is not None:
+    _pospopcnt_lib.pospopcnt_u32.argtypes = [
+        np.ctypeslib.ndpointer(dtype=np.uint32, flags='C_CONTIGUOUS'),
+        ctypes.c_size_t,
+        np.ctypeslib.ndpointer(dtype=np.uint64, flags='C_CONTIGUOUS'),
+    ]
+    _pospopcnt_lib.pospopcnt_u32.restype = None
+    _pospopcnt_lib.signed_exponent_bitpair_count_u32.argtypes = [
+        np.ctypeslib.ndpointer(dtype=np.uint32, flags='C_CONTIGUOUS'),
+        ctypes.c_size_t,
+        ctypes.POINTER(ctypes.c_uint32),
+        np.ctypeslib.ndpointer(dtype=np.uint64, flags='C_CONTIGUOUS'),
+        np.ctypeslib.ndpointer(dtype=np.uint64, flags='C_CONTIGUOUS'),
+        np.ctypeslib.ndpointer(dtype=np.uint64, flags='C_CONTIGUOUS'),
+    ]
+    _pospopcnt_lib.signed_exponent_bitpair_count_u32.restype = ctypes.c_int
+
+# Acklam coefficients for normal_inv_acklam (tuples are compile-time constants in Numba)
+ACKLAM_A = (-3.969683028665376e+01, 2.209460984245205e+02,
+            -2.759285104469687e+02, 1.383577518672690e+02,
+            -3.066479806614716e+01, 2.506628277459239e+00)
+ACKLAM_B = (-5.447609879822406e+01, 1.615858368580409e+02,
+            -1.556989798598866e+02, 6.680131188771972e+01,
+            -1.328068155288572e+01)
+ACKLAM_C = (-7.784894002430293e-03, -3.223964580411365e-01,
+            -2.400758277161838e+00, -2.549732539343734e+00,
+             4.374664141464968e+00,  2.938163982698783e+00)
+ACKLAM_D = ( 7.784695709041462e-03,  3.224671290700398e-01,
+             2.445134137142996e+00,  3.754408661907416e+00)
+
+@jit(types.float64(types.float64), nopython=True, cache=True)
 def normal_inv_acklam(p):
     """Acklam's inverse normal CDF approximation"""
-    # Acklam coefficients
-    a = np.array([-3.969683028665376e+01, 2.209460984245205e+02,
-                  -2.759285104469687e+02, 1.383577518672690e+02,
-                  -3.066479806614716e+01, 2.506628277459239e+00])
-    b = np.array([-5.447609879822406e+01, 1.615858368580409e+02,
-                  -1.556989798598866e+02, 6.680131188771972e+01,
-                  -1.328068155288572e+01])
-    c = np.array([-7.784894002430293e-03, -3.223964580411365e-01,
-                  -2.400758277161838e+00, -2.549732539343734e+00,
-                   4.374664141464968e+00,  2.938163982698783e+00])
-    d = np.array([ 7.784695709041462e-03,  3.224671290700398e-01,
-                   2.445134137142996e+00,  3.754408661907416e+00])
+    a0, a1, a2, a3, a4, a5 = ACKLAM_A
+    b0, b1, b2, b3, b4 = ACKLAM_B
+    c0, c1, c2, c3, c4, c5 = ACKLAM_C
+    d0, d1, d2, d3 = ACKLAM_D
 
     if p <= 0.0:
         return -np.inf
@@ -40,29 +82,29 @@ def normal_inv_acklam(p):
     # lower region
     if p < p_low:
         q = math.sqrt(-2.0 * math.log(p))
-        return (((((c[0]*q + c[1])*q + c[2])*q + c[3])*q + c[4])*q + c[5]) / \
-               ((((d[0]*q + d[1])*q + d[2])*q + d[3])*q + 1.0)
+        return (((((c0*q + c1)*q + c2)*q + c3)*q + c4)*q + c5) / \
+               ((((d0*q + d1)*q + d2)*q + d3)*q + 1.0)
 
     # upper region
     if p > p_high:
         q = math.sqrt(-2.0 * math.log(1.0 - p))
-        return -(((((c[0]*q + c[1])*q + c[2])*q + c[3])*q + c[4])*q + c[5]) / \
-                ((((d[0]*q + d[1])*q + d[2])*q + d[3])*q + 1.0)
+        return -(((((c0*q + c1)*q + c2)*q + c3)*q + c4)*q + c5) / \
+                ((((d0*q + d1)*q + d2)*q + d3)*q + 1.0)
 
     # central region
     q = p - 0.5
     r = q*q
-    return (((((a[0]*r + a[1])*r + a[2])*r + a[3])*r + a[4])*r + a[5]) * q / \
-           (((((b[0]*r + b[1])*r + b[2])*r + b[3])*r + b[4])*r + 1.0)
+    return (((((a0*r + a1)*r + a2)*r + a3)*r + a4)*r + a5) * q / \
+           (((((b0*r + b1)*r + b2)*r + b3)*r + b4)*r + 1.0)
 
-@jit(nopython=True)
+@jit(types.float64(types.float64, types.float64), nopython=True, cache=True)
 def binom_confidence(n, c):
     """Calculate binomial confidence"""
     v = 1.0 - (1.0 - c) * 0.5
     p = 0.5 + normal_inv_acklam(v) / (2.0 * math.sqrt(n))
     return 1.0 if p > 1.0 else p
 
-@jit(nopython=True)
+@jit(types.float64(types.float64, types.float64), nopython=True, cache=True)
 def entropy2(p1, p2):
     """Calculate binary entropy"""
     result = 0.0
@@ -72,13 +114,13 @@ def entropy2(p1, p2):
         result -= p2 * math.log(p2)
     return result / math.log(2.0)
 
-@jit(nopython=True)
+@jit(types.float64(types.float64, types.float64), nopython=True, cache=True)
 def binom_free_entropy(n, c):
     """Calculate binomial free entropy"""
     p = binom_confidence(n, c)
     return 1.0 - entropy2(p, 1.0 - p)
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def signed_exponent_kernel(a_uint):
     """Convert float to signed exponent representation"""
     sfmask = FLOAT_SIGN_MASK | FLOAT_SIGNIFICAND_MASK
@@ -97,10 +139,14 @@ def signed_exponent_kernel(a_uint):
     
     return sf | esigned
 
-@jit(nopython=True)
-def signed_exponent(data):
-    """Apply signed exponent transformation to array"""
-    result = np.empty_like(data, dtype=np.float32)
+@jit(nopython=True, nogil=True, cache=True)
+def signed_exponent(data, out=None):
+    """Apply signed exponent transformation to array, optionally into a
+    preallocated float32 output of the same length"""
+    if out is None:
+        result = np.empty_like(data, dtype=np.float32)
+    else:
+        result = out
     # View as uint32 for bit manipulation
     data_uint = data.view(np.uint32)
     result_uint = result.view(np.uint32)
@@ -110,31 +156,127 @@ def signed_exponent(data):
     
     return result
 
-@jit(nopython=True)
-def bitpair_count_kernel(a, b, BC):
-    """Count bit pairs between two uint32 values"""
-    mask = 1
-    for i in range(NBITS):
-        j = (a & mask) >> i
-        k = (b & mask) >> i
-        BC[NBITS - i - 1, j, k] += 1
-        mask <<= 1
+def positional_popcount(u):
+    """Count set bits at each bit position of a uint32 array (MSB first)"""
+    if _pospopcnt_lib is None:
+        return positional_popcount_np(u)
+    
+    u = np.ascontiguousarray(u, dtype=np.uint32)
+    counts = np.zeros(NBITS, dtype=np.uint64)
+    _pospopcnt_lib.pospopcnt_u32(u, u.size, counts)
+    return counts.astype(np.int64)[::-1]
+
+def positional_popcount_np(u):
+    """Count set bits at each bit position of a uint32 array (MSB first), NumPy version"""
+    counts = np.zeros(NBITS, dtype=np.int64)
+    
+    # Unpack in blocks to bound the size of the 32x larger bit array
+    for start in range(0, len(u), POPCOUNT_BLOCK_SIZE):
+        block = u[start:start + POPCOUNT_BLOCK_SIZE].astype('<u4', copy=False)
+        bits = np.unpackbits(block.view(np.uint8), bitorder='little')
+        counts += bits.reshape(-1, NBITS).sum(axis=0, dtype=np.int64)
+    
+    return counts[::-1]
 
-@jit(nopython=True)
 def bitpair_count(A, B):
     """Count bit pairs between two arrays"""
-    n = len(A)
-    BC = np.zeros((NBITS, 2, 2), dtype=np.int32)
+    n = min(len(A), len(B))
+    A_uint = A[:n].view(np.uint32)
+    B_uint = B[:n].view(np.uint32)
     
-    A_uint = A.view(np.uint32)
-    B_uint = B.view(np.uint32)
+    # Pairs (1,1) plus the marginal set-bit counts determine all four cells
+    c11 = positional_popcount(A_uint & B_uint)
+    c1x = positional_popcount(A_uint)
+    cx1 = positional_popcount(B_uint)
     
-    for i in range(n):
-        bitpair_count_kernel(A_uint[i], B_uint[i], BC)
+    return bitpair_count_from_popcounts(n, c11, c1x, cx1)
+
+def signed_exponent_bitpair_count(data, fill=None):
+    """Count bit pairs between consecutive elements of the signed exponent
+    representation of data, transforming one block at a time so the
+    transformed array is never materialized in full.
+    
+    If fill is given, data is checked for NaN and fill values in the same
+    pass, and None is returned as soon as one is found."""
+    if _pospopcnt_lib is not None:
+        return signed_exponent_bitpair_count_native(data, fill)
+    
+    n = len(data) - 1
+    c11 = np.zeros(NBITS, dtype=np.int64)
+    c1x = np.zeros(NBITS, dtype=np.int64)
+    
+    # Reuse one output buffer for the transformed blocks
+    buffer = np.empty(min(n, POPCOUNT_BLOCK_SIZE) + 1, dtype=np.float32)
+    fill_u32 = None if fill is None else missing_bit_pattern(fill)
+    
+    for start in range(0, n, POPCOUNT_BLOCK_SIZE):
+        # One element of overlap pairs the last value with the next block
+        chunk = data[start:start + POPCOUNT_BLOCK_SIZE + 1]
+        if fill_u32 is not None and contains_missing(chunk.view(np.uint32), fill_u32):
+            return None
+        block = signed_exponent(chunk, buffer[:len(chunk)]).view(np.uint32)
+        if start == 0:
+            first = block[0]
+        last = block[-1]
+        c11 += positional_popcount(block[:-1] & block[1:])
+        c1x += positional_popcount(block[:-1])
+    
+    # Second elements of the pairs are the first ones shifted by one
+    cx1 = c1x - bits_msb_first(first) + bits_msb_first(last)
+    
+    return bitpair_count_from_popcounts(n, c11, c1x, cx1)
+
+def missing_bit_pattern(fill):
+    """Bit pattern of a float32 fill value as uint32"""
+    return np.array([fill], dtype=np.float32).view(np.uint32)[0]
+
+def contains_missing(u, fill_u32):
+    """Check if float32 bit patterns (as uint32) contain NaN or fill_u32"""
+    return bool(np.any(((u & FLOAT_ABS_MASK) > FLOAT_EXPONENT_MASK) | (u == fill_u32)))
+
+def consecutive_bitpair_count(u):
+    """Count bit pairs between consecutive elements of a uint32 array,
+    reading the array once for the pairs and once for the marginals"""
+    n = len(u) - 1
+    c11 = positional_popcount(u[:-1] & u[1:])
+    c_all = positional_popcount(u)
+    
+    # First elements of the pairs are u[:-1], second elements u[1:]
+    c1x = c_all - bits_msb_first(u[-1])
+    cx1 = c_all - bits_msb_first(u[0])
+    
+    return bitpair_count_from_popcounts(n, c11, c1x, cx1)
+
+def bits_msb_first(x):
+    """Bits of a uint32 value as an int64 array (MSB first)"""
+    return np.unpackbits(np.array([x], dtype='>u4').view(np.uint8)).astype(np.int64)
+
+def signed_exponent_bitpair_count_native(data, fill=None):
+    """Count bit pairs between consecutive elements of the signed exponent
+    representation of data in a single fused SIMD pass (libpospopcnt.so),
+    checking for NaN and fill values on the way if fill is given"""
+    u = np.ascontiguousarray(data, dtype=np.float32).view(np.uint32)
+    c11 = np.zeros(NBITS, dtype=np.uint64)
+    c1x = np.zeros(NBITS, dtype=np.uint64)
+    cx1 = np.zeros(NBITS, dtype=np.uint64)
+    missval = None if fill is None else ctypes.byref(ctypes.c_uint32(missing_bit_pattern(fill)))
+    if _pospopcnt_lib.signed_exponent_bitpair_count_u32(u, u.size, missval, c11, c1x, cx1):
+        return None
+    
+    return bitpair_count_from_popcounts(len(u) - 1, c11.astype(np.int64)[::-1],
+                                        c1x.astype(np.int64)[::-1], cx1.astype(np.int64)[::-1])
+
+def bitpair_count_from_popcounts(n, c11, c1x, cx1):
+    """Assemble bit pair counts from (1,1) and marginal positional popcounts"""
+    BC = np.empty((NBITS, 2, 2), dtype=np.int64)
+    BC[:, 1, 1] = c11
+    BC[:, 1, 0] = c1x - c11
+    BC[:, 0, 1] = cx1 - c11
+    BC[:, 0, 0] = n - c1x - cx1 + c11
     
     return BC
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def mutual_information_kernel(p):
     """Calculate mutual information from probability matrix"""
     py = np.array([p[0,0] + p[1,0], p[0,1] + p[1,1]])
@@ -148,11 +290,15 @@ def mutual_information_kernel(p):
     
     return M / math.log(2.0)
 
-@jit(nopython=True)
 def mutual_information(A, B, nelements):
     """Calculate mutual information between two arrays"""
-    confidence = 0.99
     BC = bitpair_count(A, B)
+    return mutual_information_from_counts(BC, nelements)
+
+@jit(nopython=True, cache=True)
+def mutual_information_from_counts(BC, nelements):
+    """Calculate mutual information from bit pair counts"""
+    confidence = 0.99
     
     MI = np.zeros(NBITS)
     P = np.zeros((2, 2))
@@ -171,64 +317,51 @@ def mutual_information(A, B, nelements):
     
     return MI
 
-@jit(nopython=True)
 def bitinformation(data):
     """Calculate bit information for array"""
     n = len(data)
     if n < 2:
         return np.zeros(NBITS)
-    return mutual_information(data, data[1:], n - 1)
+    BC = consecutive_bitpair_count(data.view(np.uint32))
+    return mutual_information_from_counts(BC, n - 1)
 
-@jit(nopython=True)
-def get_keepbits(bit_info, inflevel):
-    """Get number of bits to keep based on information level"""
+def signed_exponent_bitinformation(data, fill=None):
+    """Calculate bit information for the signed exponent representation of array.
+    If fill is given, returns None if data contains NaN or fill values."""
+    n = len(data)
+    if n < 2:
+        return np.zeros(NBITS)
+    BC = signed_exponent_bitpair_count(data, fill)
+    if BC is None:
+        return None
+    return mutual_information_from_counts(BC, n - 1)
+
+def keepbits_from_cdf(cdf, inflevel):
+    """Get number of mantissa bits to keep: first bit whose CDF exceeds inflevel"""
     floatNMBITS = 9
     keepMantissaBits = 23
     
-    # Find maximum bit info
-    bitInfoMax = -1e33
-    for i in range(NBITS):
-        if bit_info[i] > bitInfoMax:
-            bitInfoMax = bit_info[i]
-    
-    # Find maximum in last 4 bits
-    bitInfoMaxLast4 = -1e33
-    for i in range(NBITS - 4, NBITS):
-        if bit_info[i] > bitInfoMaxLast4:
-            bitInfoMaxLast4 = bit_info[i]
-    bitInfoMaxLast4 *= 1.5
-    
-    # Clean bit info
-    infoPerBitCleaned = np.zeros(NBITS)
-    for i in range(NBITS):
-        if bit_info[i] > bitInfoMaxLast4:
-            infoPerBitCleaned[i] = bit_info[i]
+    above = np.flatnonzero(cdf > inflevel)
+    if len(above) > 0:
+        keepMantissaBits = int(above[0]) + 1 - floatNMBITS
+    
+    return min(max(keepMantissaBits, 1), 23)
+
+def get_keepbits(bit_info, inflevel):
+    """Get number of bits to keep based on information level"""
+    # Zero out bits not clearly above the information in the last 4 bits
+    bitInfoMaxLast4 = 1.5 * np.max(bit_info[NBITS - 4:])
+    infoPerBitCleaned = np.where(bit_info > bitInfoMaxLast4, bit_info, 0.0)
     
     # Calculate cumulative sum
-    for i in range(1, NBITS):
-        infoPerBitCleaned[i] += infoPerBitCleaned[i - 1]
+    infoCDF = np.cumsum(infoPerBitCleaned)
     
-    lastBit = infoPerBitCleaned[NBITS - 1]
+    lastBit = infoCDF[NBITS - 1]
     if lastBit > 0.0:
-        # Calculate CDF
-        cdf = infoPerBitCleaned / lastBit
-        
-        nonMantissaBits = floatNMBITS
-        
-        for i in range(NBITS):
-            if cdf[i] > inflevel:
-                keepMantissaBits = i + 1 - nonMantissaBits
-                break
-    
-    nsb = keepMantissaBits
-    if nsb < 1:
-        nsb = 1
-    if nsb > 23:
-        nsb = 23
+        return keepbits_from_cdf(infoCDF / lastBit, inflevel)
     
-    return nsb
+    return 23
 
-@jit(nopython=True)
 def get_keepbits_gradient(bit_info, threshold, tolerance):
     """
     Get number of bits to keep using gradient-based method with artificial information removal.
@@ -254,124 +387,74 @@ def get_keepbits_gradient(bit_info, threshold, tolerance):
     floatNMBITS = 9
     keepMantissaBits = 23
     
-    # Clean bit info
-    infoPerBitCleaned = np.zeros(NBITS)
-    for i in range(NBITS):
-        if bit_info[i] >= 0:
-            infoPerBitCleaned[i] = bit_info[i]
+    # Clean bit info and calculate cumulative sum
+    infoPerBitCleaned = np.where(bit_info >= 0, bit_info, 0.0)
+    infoCDF = np.cumsum(infoPerBitCleaned)
     
-    # Calculate cumulative sum
-    for i in range(1, NBITS):
-        infoPerBitCleaned[i] += infoPerBitCleaned[i - 1]
-    
-    lastBit = infoPerBitCleaned[NBITS - 1]
+    lastBit = infoCDF[NBITS - 1]
     if lastBit > 0.0:
-        # Calculate CDF
-        cdf = infoPerBitCleaned / lastBit
-        
-        # Calculate gradient of CDF
-        gradient_array = np.zeros(NBITS - 1)
-        for i in range(NBITS - 1):
-            gradient_array[i] = cdf[i + 1] - cdf[i]
+        # Calculate CDF and its gradient
+        cdf = infoCDF / lastBit
+        gradient_array = np.diff(cdf)
         
-        # Total sum of information
-        infSum = 0.0
-        for i in range(NBITS):
-            infSum += bit_info[i]
+        # Running sum of information; the total is its last element
+        runningSum = np.cumsum(bit_info)
+        infSum = runningSum[NBITS - 1]
         
         # Sign and exponent bits (assuming 32-bit float: 1 sign + 8 exponent = 9 bits)
         sign_and_exponent = floatNMBITS
         
-        # Sum of sign and exponent bits
-        SignExpSum = 0.0
-        for i in range(sign_and_exponent):
-            SignExpSum += bit_info[i]
-        
-        # Initialize current bit sum with sign and exponent sum
-        CurrentBit_Sum = SignExpSum
-        infbits = NBITS - 1  # Default to all bits
-        
         # Find intersection point where gradient < tolerance and cumulative sum >= threshold * infSum
-        for i in range(sign_and_exponent, len(gradient_array) - 1):
-            CurrentBit_Sum += bit_info[i]
-            if gradient_array[i] < tolerance and CurrentBit_Sum >= threshold * infSum:
-                infbits = i
-                break
+        candidates = np.arange(sign_and_exponent, len(gradient_array) - 1)
+        intersect = candidates[(gradient_array[candidates] < tolerance) &
+                               (runningSum[candidates] >= threshold * infSum)]
+        infbits = int(intersect[0]) if len(intersect) > 0 else NBITS - 1
         
         # Calculate keep bits based on infbits
         keepMantissaBits = infbits + 1 - floatNMBITS
     
     # Ensure valid range
-    nsb = keepMantissaBits
-    if nsb < 1:
-        nsb = 1
-    if nsb > 23:
-        nsb = 23
-    
-    return nsb
+    return min(max(keepMantissaBits, 1), 23)
 
-@jit(nopython=True)
 def get_keepbits_monotonic(bit_info, inflevel):
     """Get number of bits to keep based on information level
     When calculating CDF, it uses the monotonic component of
     exponential moving averaged bit information.
     """
     floatNMBITS = 9
-    keepMantissaBits = 23
     
-    # Clean bit info
-    infoPerBitCleaned = np.zeros(NBITS)
-    infoCDF = np.zeros(NBITS)
-    flag = 0
-    current_min = bit_info[floatNMBITS]
-    for i in range(NBITS):
-        if i < floatNMBITS:
-            infoPerBitCleaned[i] = bit_info[i]
-            continue
-        current_min = min(current_min, bit_info[i])
-        if bit_info[i] > current_min * 1.5:
-            flag += 1
-        infoPerBitCleaned[i] = 0 if flag > 2 else bit_info[i]
+    # Clean bit info: past the exponent, zero every bit after the third
+    # time the information rises above 1.5x its running minimum
+    mantissa_info = bit_info[floatNMBITS:]
+    current_min = np.minimum.accumulate(mantissa_info)
+    flag = np.cumsum(mantissa_info > current_min * 1.5)
+    infoPerBitCleaned = np.concatenate((bit_info[:floatNMBITS],
+                                        np.where(flag > 2, 0.0, mantissa_info)))
     
-
     # Calculate cumulative sum
-    infoCDF[0] = infoPerBitCleaned[0]
-    for i in range(1, NBITS):
-        infoCDF[i] = infoPerBitCleaned[i] + infoCDF[i - 1]
+    infoCDF = np.cumsum(infoPerBitCleaned)
     
     lastBit = infoCDF[NBITS - 1]
     if lastBit > 0.0:
-    # Calculate CDF
+        # Calculate CDF
         cdf = infoCDF / lastBit
     else:
         cdf = infoCDF
-
-    nonMantissaBits = floatNMBITS
-    
-    for i in range(NBITS):
-        if cdf[i] > inflevel:
-            keepMantissaBits = i + 1 - nonMantissaBits
-            break
     
-    nsb = keepMantissaBits
-    if nsb < 1:
-        nsb = 1
-    if nsb > 23:
-        nsb = 23
+    return keepbits_from_cdf(cdf, inflevel)
 
-    return nsb
-
-@jit(nopython=True)
-def analyze_and_get_nsb(data, inflevel, monotonic=False):
-    """Analyze data and get number of significant bits"""
+def analyze_and_get_nsb(data, inflevel, monotonic=False, fill=None):
+    """Analyze data and get number of significant bits.
+    If fill is given, returns None if data contains NaN or fill values."""
     if len(data) < 2:
+        if fill is not None and contains_missing(data.view(np.uint32), missing_bit_pattern(fill)):
+            return None
         return 1
     
-    # Create copy and apply signed exponent
-    v_copy = signed_exponent(data.copy())
-    
-    # Calculate bit information
-    bit_info = bitinformation(v_copy)
+    # Calculate bit information, applying signed exponent on the fly
+    bit_info = signed_exponent_bitinformation(data, fill)
+    if bit_info is None:
+        return None
     
     # Get number of bits to keep
     if monotonic:
@@ -383,22 +466,64 @@ def analyze_and_get_nsb(data, inflevel, monotonic=False):
     
     return nsb
 
-@jit(nopython=True)
-def bitround(nsb, data, missval):
-    """Apply bit rounding to data array"""
+def analyze_and_bitround_chunks(data2d, inflevel, missval, monotonic=False, fill=None):
+    """Analyze and bitround each row of a 2D array independently.
+    
+    Rows are analyzed concurrently on a thread pool (the bit counting runs
+    in native code or NumPy and releases the GIL), then each row with a
+    valid NSB is bitrounded in place. Returns the NSB of every row.
+    
+    If fill is given, the analysis also checks for NaN and fill values;
+    if any row contains one, nothing is bitrounded and None is returned."""
+    with ThreadPoolExecutor(max_workers=numba.get_num_threads()) as pool:
+        nsbs = list(pool.map(lambda row: analyze_and_get_nsb(row, inflevel, monotonic=monotonic, fill=fill), data2d))
+    if None in nsbs:
+        return None
+    nsbs = np.array(nsbs, dtype=np.int64)
+    
+    # bitround is parallel over tiles itself, so rows are rounded in turn
+    missval_u32 = missing_bit_pattern(missval)
+    for row, nsb in zip(data2d.view(np.uint32), nsbs):
+        if nsb > 0 and nsb <= 23:
+            bitround_u32(nsb, row, missval_u32)
+    
+    return nsbs
+
+@jit(nopython=True, cache=True)
+def bitround_tile(u32_ptr, missval_u32, msk_f32_u32_hshv, msk_f32_u32_zro):
+    """Apply bit rounding masks to one tile of the data array (as uint32)"""
+    # Round unconditionally and select the result for valid values, so the
+    # loop body has no branches and can be vectorized. NaN (exponent all
+    # ones, non-zero significand) and missval are detected with integer
+    # compares on the bit pattern instead of floating-point compares.
+    for idx in range(len(u32_ptr)):
+        ui = u32_ptr[idx]
+        is_nan = (ui & FLOAT_ABS_MASK) > FLOAT_EXPONENT_MASK
+        is_miss = ui == missval_u32
+        rounded = (ui + msk_f32_u32_hshv) & msk_f32_u32_zro
+        u32_ptr[idx] = ui if (is_nan | is_miss) else rounded
+
+@jit(nopython=True, parallel=True, cache=True)
+def bitround_u32(nsb, u32_ptr, missval_u32):
+    """Apply bit rounding to float32 data viewed as uint32, with missval
+    given as its uint32 bit pattern"""
     prc_bnr_xpl_rqr = nsb
     bit_xpl_nbr_zro = BIT_XPL_NBR_SGN_FLT - prc_bnr_xpl_rqr
     
-    msk_f32_u32_zro = 0xffffffff
-    msk_f32_u32_zro <<= bit_xpl_nbr_zro
+    msk_f32_u32_zro = np.uint32(0xffffffff) << np.uint32(bit_xpl_nbr_zro)
     
     msk_f32_u32_one = ~msk_f32_u32_zro
-    msk_f32_u32_hshv = msk_f32_u32_one & (msk_f32_u32_zro >> 1)
-    
-    # Work with uint32 view for bit manipulation
-    u32_ptr = data.view(np.uint32)
-    
-    for idx in range(len(data)):
-        if data[idx] != missval and not math.isnan(data[idx]):
-            u32_ptr[idx] += msk_f32_u32_hshv
-            u32_ptr[idx] &= msk_f32_u32_zro
\ No newline at end of file
+    msk_f32_u32_hshv = msk_f32_u32_one & (msk_f32_u32_zro >> np.uint32(1))
+    
+    # Stream L2-sized tiles in parallel across threads. Each tile is passed
+    # as a slice so its loop indexes from zero and stays vectorizable.
+    n = len(u32_ptr)
+    ntiles = (n + BITROUND_TILE_SIZE - 1) // BITROUND_TILE_SIZE
+    for tile in prange(ntiles):
+        lo = tile * BITROUND_TILE_SIZE
+        hi = min(lo + BITROUND_TILE_SIZE, n)
+        bitround_tile(u32_ptr[lo:hi], missval_u32, msk_f32_u32_hshv, msk_f32_u32_zro)
+
+def bitround(nsb, data, missval):
+    """Apply bit rounding to data array"""
+    bitround_u32(nsb, data.view(np.uint32), missing_bit_pattern(missval))
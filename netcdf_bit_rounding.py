@@ -8,10 +8,30 @@ This is a Python implementation of the C version in src/netcdf_bit_rounding.c
 
 import sys
 import argparse
+import collections
+import contextlib
+import io
+import itertools
+import math
+import multiprocessing
 import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+import h5netcdf
+import h5py
+import numba
 import numpy as np
 import xarray as xr
-from bit_rounding import analyze_and_get_nsb, bitround
+from bit_rounding import analyze_and_get_nsb, analyze_and_bitround_chunks, bitround_u32, missing_bit_pattern
+
+try:
+    import hdf5plugin
+except ImportError:
+    hdf5plugin = None
+
+# Target size of output chunks, large enough for the compressor to work well
+CHUNK_TARGET_BYTES = 1 << 20
 
 
 def get_file_size(filepath):
@@ -21,24 +41,170 @@ def get_file_size(filepath):
     except OSError:
         return -1
 
+def available_cpus():
+    """Number of CPUs this process is allowed to run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def pick_chunks(dims, sizes, dtype_bytes, target=CHUNK_TARGET_BYTES):
+    """Chunk sizes spanning the last two dimensions, grown along the leading
+    dimensions (innermost first) until a chunk holds at least target bytes"""
+    chunks = {dim: 1 for dim in dims[:-2]}
+    chunks.update({dim: sizes[dim] for dim in dims[-2:]})
+    nbytes = math.prod(chunks.values()) * dtype_bytes
+    
+    for dim in reversed(dims[:-2]):
+        if nbytes >= target:
+            break
+        # Smallest divisor of the dimension reaching the target, so the
+        # chunks tile the dimension evenly; without one close to the target
+        # (e.g. a prime length), the last chunk is left partial
+        needed = math.ceil(target / nbytes)
+        size = next((n for n in range(needed, min(2 * needed, sizes[dim]) + 1) if sizes[dim] % n == 0),
+                    min(needed, sizes[dim]))
+        chunks[dim] = size
+        nbytes *= size
+    
+    return chunks
+
+def compression_encoding(compression_level, bitshuffle=False):
+    """HDF5 filter encoding for compressed variables: zlib with byte shuffle,
+    or Bitshuffle+Zstd (requires hdf5plugin)"""
+    if not bitshuffle:
+        return {'zlib': True, 'complevel': compression_level, 'shuffle': True}
+    # Bitshuffle groups the zeroed trailing mantissa bits of bitrounded
+    # values into long zero runs, which Zstd compresses quickly
+    return {'zlib': False, 'shuffle': False,
+            **hdf5plugin.Bitshuffle(cname='zstd', clevel=compression_level)}
+
+def chunk_at(data, offset, chunks):
+    """Chunk of data starting at offset, zero-padded to the full chunk shape"""
+    block = data[tuple(slice(o, o + c) for o, c in zip(offset, chunks))]
+    if block.shape != tuple(chunks):
+        padded = np.zeros(chunks, dtype=data.dtype)
+        padded[tuple(slice(0, n) for n in block.shape)] = block
+        block = padded
+    return block
+
+def shuffle_deflate_chunk(block, compression_level):
+    """Compress a chunk exactly as HDF5's shuffle and deflate filters do"""
+    # Shuffle: byte k of every element, for k = 0 .. itemsize - 1
+    shuffled = np.ascontiguousarray(block).view(np.uint8).reshape(-1, block.itemsize).T
+    return zlib.compress(shuffled.tobytes(), compression_level)
+
+def write_deflated_variable(output_file, var_name, data_array, chunks, compression_level, unlimited_dims=()):
+    """Append a variable compressed with zlib and shuffle to a NetCDF file,
+    compressing its chunks on a thread pool"""
+    # Apply the same CF encoding to_netcdf would (coordinates attribute,
+    # fill value, packing)
+    variables, _ = xr.conventions.encode_dataset_coordinates(data_array.to_dataset(name=var_name))
+    encoded = xr.conventions.encode_cf_variable(variables[var_name], name=var_name)
+    attrs = dict(encoded.attrs)
+    fillvalue = attrs.pop('_FillValue', None)
+    
+    with h5netcdf.File(output_file, 'a') as f:
+        # Dimensions used only by variables written this way are missing
+        for dim, size in data_array.sizes.items():
+            if dim not in f.dimensions:
+                if dim in unlimited_dims:
+                    f.dimensions[dim] = None
+                    f.resize_dimension(dim, size)
+                else:
+                    f.dimensions[dim] = size
+        nc_var = f.create_variable(var_name, data_array.dims, encoded.dtype, fillvalue=fillvalue, chunks=chunks,
+                                   compression='gzip', compression_opts=compression_level, shuffle=True)
+        nc_var.attrs.update(attrs)
+    
+    # zlib releases the GIL, so chunks compress in parallel; the compressed
+    # chunks are then written in order, bypassing the HDF5 filter pipeline
+    data = np.asarray(encoded.values)
+    offsets = list(itertools.product(*(range(0, n, c) for n, c in zip(data.shape, chunks))))
+    with h5py.File(output_file, 'r+') as f, ThreadPoolExecutor(max_workers=numba.get_num_threads()) as pool:
+        dset = f[var_name]
+        compressed = pool.map(lambda offset: shuffle_deflate_chunk(chunk_at(data, offset, chunks), compression_level), offsets)
+        for offset, buffer in zip(offsets, compressed):
+            dset.id.write_direct_chunk(offset, buffer)
+
 def is_coordinate_variable(var_name, ds):
     """Check if variable is a coordinate variable"""
     return var_name in ds.coords
 
-def contains_missing_values(data_array):
-    """Check if data array contains NaN or fill values"""
-    if np.isnan(data_array.values).any():
-        return True
+def read_variable(h5_input, var_name, data_array):
+    """Read a variable straight from the HDF5 file, bypassing xarray and dask.
     
-    # Check for fill values
-    if hasattr(data_array, '_FillValue') and data_array._FillValue is not None:
-        fill_val = data_array._FillValue
-        if np.any(data_array.values == fill_val):
-            return True
+    Contiguous, uncompressed variables are mapped from the file instead of
+    read into a new buffer; pages are copy-on-write, so bitrounding in place
+    never modifies the input file. Chunked or compressed variables are read
+    with read_direct, decompressing each chunk once into the output array.
+    Returns None for variables whose stored data needs CF decoding."""
+    # Masking non-NaN fill values or unpacking changes the data as stored
+    for key in ('_FillValue', 'missing_value'):
+        value = data_array.encoding.get(key)
+        if value is not None and not np.isnan(value):
+            return None
+    if 'scale_factor' in data_array.encoding or 'add_offset' in data_array.encoding:
+        return None
+    
+    dset = h5_input.get(var_name)
+    if not isinstance(dset, h5py.Dataset) or dset.dtype != data_array.dtype or dset.shape != data_array.shape:
+        return None
+    
+    # Only contiguous, allocated datasets have a file offset
+    offset = dset.id.get_offset()
+    if offset is not None:
+        data = np.asarray(np.memmap(h5_input.filename, dtype=dset.dtype, mode='c', offset=offset, shape=dset.shape))
+    else:
+        data = np.empty(dset.shape, dtype=dset.dtype)
+        if data.size > 0:
+            dset.read_direct(data)
+    return data_array.copy(deep=False, data=data)
+
+def is_finite_range(*values):
+    """Check if range attribute values are all numeric and finite; ranges
+    given as strings declare nothing"""
+    values = [np.asarray(value) for value in values]
+    return all(np.issubdtype(value.dtype, np.number) and bool(np.all(np.isfinite(value))) for value in values)
+
+def is_declared_clean(data_array):
+    """Check if a variable declares no fill value and a finite value range,
+    i.e. its producer guarantees there are no missing values"""
+    attrs = data_array.attrs
+    for key in ('_FillValue', 'missing_value'):
+        if key in attrs or key in data_array.encoding:
+            return False
+    
+    for key in ('actual_range', 'valid_range'):
+        if key in attrs:
+            return is_finite_range(attrs[key])
+    if 'valid_min' in attrs and 'valid_max' in attrs:
+        return is_finite_range(attrs['valid_min'], attrs['valid_max'])
     
     return False
 
-def process_float32_variable(var_name, data_array, inflevel, monotonic=False):
+def is_stored_float64(data_array):
+    """Check if a variable is stored as float64 in the file, not decoded to
+    float64 from integers (masked with a fill value, or packed)"""
+    if 'scale_factor' in data_array.encoding or 'add_offset' in data_array.encoding:
+        return False
+    return np.dtype(data_array.encoding.get('dtype', data_array.dtype)) == np.float64
+
+def downcast_to_float32(data_array):
+    """Cast a float64 variable to float32 for bitrounding; None if any
+    value lies outside the float32 range"""
+    data = data_array.values
+    # NaN are kept (as float32 NaN) and do not count towards the range
+    max_abs = np.max(np.abs(data), initial=0.0, where=~np.isnan(data))
+    if max_abs > np.finfo(np.float32).max:
+        return None
+    
+    downcast = data_array.copy(deep=False, data=data.astype(np.float32))
+    # The stored dtype follows the data, so the output is written as float32
+    downcast.encoding.pop('dtype', None)
+    return downcast
+
+def process_float32_variable(var_name, data_array, inflevel, monotonic=False, assume_clean=False):
     """Process a single float32 variable with bit rounding"""
     print(f"Variable {var_name}: ", end="", flush=True)
     
@@ -47,19 +213,26 @@ def process_float32_variable(var_name, data_array, inflevel, monotonic=False):
         print("Skipping bitrounding (not float32)")
         return data_array, False
     
-    # Get data as float32 numpy array
+    # Get data as float32 numpy array; ravel() below then returns a view,
+    # so bitround writes straight into this buffer
     data = data_array.values
+    if not data.flags['C_CONTIGUOUS']:
+        data = np.ascontiguousarray(data)
     original_shape = data.shape
     
     # Get fill value
     missval = np.float32(-999.0)  # default
-    if hasattr(data_array, '_FillValue') and data_array._FillValue is not None:
-        missval = np.float32(data_array._FillValue)
+    # NaN and declared fill values are detected during the analysis pass;
+    # without a declared fill value only NaN is checked
+    fill = np.float32(np.nan)
+    fillvalue = data_array.attrs.get('_FillValue', data_array.encoding.get('_FillValue'))
+    if fillvalue is not None:
+        missval = np.float32(fillvalue)
+        fill = missval
     
-    # Check for missing values
-    if contains_missing_values(data_array):
-        print("Skipping bitrounding (contains missing values or NaNs)")
-        return data_array, False
+    # Skip the check for variables known to have no missing values
+    if assume_clean or is_declared_clean(data_array):
+        fill = None
     
     # Calculate dimensions for chunking strategy
     ndims = len(original_shape)
@@ -67,20 +240,19 @@ def process_float32_variable(var_name, data_array, inflevel, monotonic=False):
     
     if ndims <= 2:
         # For 1D or 2D variables, process as single chunk
-        data_flat = data.flatten()
-        nsb = analyze_and_get_nsb(data_flat, inflevel, monotonic=monotonic)
+        data_flat = data.ravel()
+        nsb = analyze_and_get_nsb(data_flat, inflevel, monotonic=monotonic, fill=fill)
+        if nsb is None:
+            print("Skipping bitrounding (contains missing values or NaNs)")
+            return data_array, False
         
         if nsb > 0 and nsb <= 23:
-            bitround(nsb, data_flat, missval)
+            bitround_u32(nsb, data_flat.view(np.uint32), missing_bit_pattern(missval))
             print(f"NSB={nsb}")
             
-            # Reshape back to original shape
-            processed_data = data_flat.reshape(original_shape)
-            
-            # Create new data array with same attributes
-            result = data_array.copy()
-            result.values = processed_data
-            return result, True
+            # Wrap the bitrounded buffer with the same attributes and encoding;
+            # a shallow copy does not duplicate the data
+            return data_array.copy(deep=False, data=data), True
         else:
             print("NSB analysis failed or invalid")
             return data_array, False
@@ -95,43 +267,99 @@ def process_float32_variable(var_name, data_array, inflevel, monotonic=False):
         num_chunks = total_size // chunk_size
         print(f"chunk_size={chunk_size}, num_chunks={num_chunks}")
         
-        # Flatten data for chunk processing
-        data_flat = data.flatten()
-        
-        chunk_processed = 0
-        min_nsb = 1000
-        max_nsb = -1000
+        # One row per chunk; reshaping the contiguous data gives a view
+        chunks = data.reshape(num_chunks, chunk_size)
+        nsbs = analyze_and_bitround_chunks(chunks, inflevel, missval, monotonic=monotonic, fill=fill)
+        if nsbs is None:
+            print("  Skipping bitrounding (contains missing values or NaNs)")
+            return data_array, False
         
-        # Process each chunk
-        for chunk_idx in range(num_chunks):
-            start_idx = chunk_idx * chunk_size
-            end_idx = start_idx + chunk_size
-            chunk_data = data_flat[start_idx:end_idx]
-            
-            nsb = analyze_and_get_nsb(chunk_data, inflevel, monotonic=monotonic)
-            if nsb > 0 and nsb <= 23:
-                bitround(nsb, chunk_data, missval)
-                chunk_processed += 1
-                
-                if nsb < min_nsb:
-                    min_nsb = nsb
-                if nsb > max_nsb:
-                    max_nsb = nsb
+        valid = (nsbs > 0) & (nsbs <= 23)
+        chunk_processed = int(np.count_nonzero(valid))
         
         if chunk_processed > 0:
+            min_nsb = int(nsbs[valid].min())
+            max_nsb = int(nsbs[valid].max())
             print(f"  Processed {chunk_processed}/{num_chunks} chunks, NSB min={min_nsb} max={max_nsb}")
             
-            # Reshape back to original shape
-            processed_data = data_flat.reshape(original_shape)
-            
-            # Create new data array with same attributes
-            result = data_array.copy()
-            result.values = processed_data
-            return result, True
+            # Wrap the bitrounded buffer with the same attributes and encoding;
+            # a shallow copy does not duplicate the data
+            return data_array.copy(deep=False, data=data), True
         else:
             print("  No chunks processed successfully")
             return data_array, False
 
+def init_worker(num_threads):
+    """Split the numba threads between the worker processes"""
+    numba.set_num_threads(num_threads)
+
+def process_variable_worker(input_file, var_name, shm_name, inflevel, monotonic, assume_clean):
+    """Read one variable into shared memory and bitround it there.
+    
+    Runs in a worker process; the data never passes through pickle. Returns
+    whether the variable was bitrounded and the messages printed meanwhile."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    log = io.StringIO()
+    try:
+        with xr.open_dataset(input_file, engine="h5netcdf", chunks={}) as ds, h5py.File(input_file, 'r') as h5_input:
+            var = ds[var_name]
+            shared = np.ndarray(var.shape, dtype=var.dtype, buffer=shm.buf)
+            loaded = read_variable(h5_input, var_name, var)
+            shared[...] = loaded.values if loaded is not None else var.values
+            del loaded
+            with contextlib.redirect_stdout(log):
+                _, was_bitrounded = process_float32_variable(var_name, var.copy(deep=False, data=shared), inflevel, monotonic, assume_clean)
+            # Release every view of the buffer before closing it
+            del shared
+    finally:
+        shm.close()
+    return was_bitrounded, log.getvalue()
+
+def process_variables_in_pool(input_file, ds, var_names, inflevel, monotonic=False, assume_clean=False, jobs=1):
+    """Bitround variables in a pool of worker processes, one task per variable.
+    
+    Each variable is exchanged through a shared memory block; at most jobs
+    blocks exist at a time, and each is released as soon as its result has
+    been copied out. Returns a dict mapping each name to its bitrounded
+    DataArray, or None if it was skipped."""
+    jobs = min(jobs, len(var_names))
+    num_threads = max(1, numba.get_num_threads() // jobs)
+    # Workers are spawned rather than forked, since forking a process whose
+    # numba thread pool is running is unsafe
+    context = multiprocessing.get_context('spawn')
+    
+    results = {}
+    pending = collections.deque()
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context,
+                                 initializer=init_worker, initargs=(num_threads,)) as pool:
+            for index, name in enumerate(var_names):
+                shm = shared_memory.SharedMemory(create=True, size=max(ds[name].nbytes, 1))
+                pending.append((name, shm, pool.submit(process_variable_worker, input_file, name, shm.name,
+                                                       inflevel, monotonic, assume_clean)))
+                
+                # Keep one variable in flight per worker, collecting results
+                # in order; after the last submission, collect the rest
+                last = index == len(var_names) - 1
+                while pending and (len(pending) >= jobs or last):
+                    done_name, done_shm, future = pending[0]
+                    was_bitrounded, log = future.result()
+                    print(log, end="")
+                    results[done_name] = None
+                    if was_bitrounded:
+                        var = ds[done_name]
+                        shared = np.ndarray(var.shape, dtype=var.dtype, buffer=done_shm.buf)
+                        results[done_name] = var.copy(deep=False, data=shared.copy())
+                        del shared
+                    done_shm.close()
+                    done_shm.unlink()
+                    pending.popleft()
+    finally:
+        for _, shm, _ in pending:
+            shm.close()
+            shm.unlink()
+    return results
+
 def main():
     """Main function"""
     # Parse command line arguments
@@ -161,13 +389,40 @@ def main():
         type=int,
         default=0,
         choices=range(1, 10),
-        help='Optional compression level (1-9), enables shuffle filter'
+        help='Optional compression level (1-9), enables zlib with shuffle filter'
+    )
+    parser.add_argument(
+        '--bitshuffle',
+        action='store_true',
+        help='Compress with Bitshuffle+Zstd instead of zlib (requires hdf5plugin; readers need the filter plugin)'
     )
     parser.add_argument(
         '--monotonic-bitinfo','--monotonic_bitinfo',
         action='store_true',
         help='Use monotonic gradient-based method for bit rounding'
     )
+    parser.add_argument(
+        '--assume-clean',
+        action='store_true',
+        help='Do not check variables for NaN and fill values'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Number of worker processes bitrounding variables in parallel (default: 1)'
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=0,
+        help='Number of threads for analysis, bitrounding and compression (default: CPUs available to the process)'
+    )
+    parser.add_argument(
+        '--auto-downcast',
+        action='store_true',
+        help='Convert float64 variables within float32 range to float32 and bitround them'
+    )
     
     try:
         args = parser.parse_args()
@@ -178,79 +433,123 @@ def main():
     input_file = args.input_file
     output_file = args.output_file
     compression_level = args.complevel
+    use_zlib = not args.bitshuffle
     
     if inflevel < 0.0 or inflevel > 1.0:
         print("Error: inflevel must be between 0.0 and 1.0")
         return 1
     
+    if args.jobs < 1:
+        print("Error: jobs must be at least 1")
+        return 1
+    
+    if args.bitshuffle and hdf5plugin is None:
+        print("Error: --bitshuffle requires the hdf5plugin package")
+        return 1
+    
+    # numba sizes its thread pool by the machine's CPU count; under a CPU
+    # affinity mask (taskset, container limits) that oversubscribes the
+    # allowed cores, so threads keep migrating and evicting each other's
+    # tiles from cache
+    num_threads = args.threads if args.threads > 0 else available_cpus()
+    numba.set_num_threads(min(num_threads, numba.config.NUMBA_NUM_THREADS))
+    
     # Print processing info
-    print(f"Processing: {input_file} -> {output_file} (inflevel={inflevel:.6f}, compression={compression_level}, shuffle={'enabled' if compression_level > 0 else 'disabled'}, monotonic={args.monotonic_bitinfo})")
+    print(f"Processing: {input_file} -> {output_file} (inflevel={inflevel:.6f}, compression={compression_level}, filter={('zlib+shuffle' if use_zlib else 'bitshuffle+zstd') if compression_level > 0 else 'none'}, monotonic={args.monotonic_bitinfo})")
 
     try:
-        # Load input NetCDF file
+        # Open input NetCDF file lazily; variables are loaded one at a time
         print("Loading input file...")
-        ds = xr.open_dataset(input_file, engine="h5netcdf")
+        ds = xr.open_dataset(input_file, engine="h5netcdf", chunks={})
+        h5_input = h5py.File(input_file, 'r')
         
         processed_vars = 0
         bitrounded_vars = 0
+        bitrounded_names = []
+        
+        # With several jobs, float32 variables are bitrounded in worker
+        # processes up front; each worker uses a share of the numba threads
+        pool_results = {}
+        if args.jobs > 1:
+            candidates = [name for name in ds.data_vars
+                          if ds[name].dtype == np.float32 and not is_coordinate_variable(name, ds)]
+            if candidates:
+                pool_results = process_variables_in_pool(input_file, ds, candidates, inflevel,
+                                                         args.monotonic_bitinfo, args.assume_clean, args.jobs)
         
         # Process each data variable in place
         for var_name in ds.data_vars:
             var = ds[var_name]
             processed_vars += 1
             
-            # Only process float32 variables
-            if var.dtype == np.float32:
+            # Only process float32 variables, and float64 variables that
+            # are converted to float32 when downcasting
+            downcast = args.auto_downcast and var.dtype == np.float64 and is_stored_float64(var)
+            if var.dtype == np.float32 or downcast:
                 # Skip coordinate variables
                 if is_coordinate_variable(var_name, ds):
                     print(f"Variable {var_name}: Skipping bitrounding (coordinate variable)")
                     continue
                 
-               
-                # Process the variable
-                processed_var, was_bitrounded = process_float32_variable(var_name, ds[var_name], inflevel, args.monotonic_bitinfo)
-                
-                # Update the dataset with processed variable in place
-                ds[var_name] = processed_var
+                if var_name in pool_results:
+                    processed_var = pool_results.pop(var_name)
+                    was_bitrounded = processed_var is not None
+                else:
+                    # Load only this variable (directly from the file when no
+                    # decoding is needed) and process it
+                    loaded = read_variable(h5_input, var_name, var)
+                    if loaded is None:
+                        loaded = var.compute()
+                    if downcast:
+                        loaded = downcast_to_float32(loaded)
+                        if loaded is None:
+                            print(f"Variable {var_name}: Skipping (dtype={var.dtype}, values exceed float32 range)")
+                            continue
+                    processed_var, was_bitrounded = process_float32_variable(var_name, loaded, inflevel, args.monotonic_bitinfo, args.assume_clean)
+                    del loaded
                 
+                # Keep bitrounded data; other variables stay lazy and are
+                # streamed from the input file when saving
                 if was_bitrounded:
+                    ds[var_name] = processed_var
                     bitrounded_vars += 1
+                    bitrounded_names.append(var_name)
+                del processed_var
             else:
                 print(f"Variable {var_name}: Skipping (dtype={var.dtype}, only processing float32)")
+        h5_input.close()
         
         # Prepare encoding for compression if requested
         encoding = {}
         if compression_level > 0:
             for var_name in ds.data_vars:
                 var = ds[var_name]
-                # Apply chunking for 3D+ variables before processing
-                if len(var.dims) >= 3:
-                    # Create chunking dict based on last two dimensions
-                    chunks = {}
-                    for i, dim in enumerate(var.dims):
-                        if i < len(var.dims) - 2:
-                            # Set chunk size to 1 for all dimensions except last two
-                            chunks[dim] = 1
-                        else:
-                            # Use full dimension size for last two dimensions
-                            chunks[dim] = var.sizes[dim]
-                    
-                    #print(f"Variable {var_name}: Applying chunking {chunks}")
-                    #ds[var_name] = var.chunk(chunks)
-                if var.dtype == np.float32 and not is_coordinate_variable(var_name, ds):
+                # Scalars cannot be chunked or filtered
+                if var.dtype == np.float32 and var.ndim > 0 and not is_coordinate_variable(var_name, ds):
+                    # Chunk over the last two dimensions (the whole variable
+                    # for 1D/2D), grouping leading slabs until chunks reach
+                    # the target size
+                    chunks = pick_chunks(var.dims, var.sizes, var.dtype.itemsize)
                     encoding[var_name] = {
-                        'zlib': True,
-                        'complevel': compression_level,
-                        'shuffle': True,
+                        **compression_encoding(compression_level, args.bitshuffle),
                         'chunksizes': tuple(chunks[dim] for dim in var.dims)
                     }
         
+        # Bitrounded variables compressed with zlib are appended afterwards,
+        # compressing their chunks on all cores; scalars have no chunks
+        deflated = [name for name in bitrounded_names if name in encoding and use_zlib and ds[name].ndim > 0]
+        
         # Save output NetCDF file
         print("Saving output file...")
-        if encoding:
-            ds.to_netcdf(output_file, encoding=encoding, engine="h5netcdf")
-        else:
-            ds.to_netcdf(output_file, engine="h5netcdf")
+        # Unlimited dimensions used only by deflated variables are created
+        # when those are appended
+        unlimited_dims = set(ds.encoding.get('unlimited_dims', ()))
+        kept = ds.drop_vars(deflated)
+        kept.to_netcdf(output_file, encoding={name: enc for name, enc in encoding.items() if name not in deflated},
+                       unlimited_dims=[dim for dim in unlimited_dims if dim in kept.dims], engine="h5netcdf")
+        for var_name in deflated:
+            write_deflated_variable(output_file, var_name, ds[var_name], encoding[var_name]['chunksizes'], compression_level,
+                                    unlimited_dims)
         
         total_uncompressed_size = ds.nbytes
         # Close the dataset
@@ -0,0 +1,276 @@
+#include "pospopcnt.h"
+
+#if defined(__x86_64__) || defined(__i386__)
+#include <immintrin.h>
+#define POSPOPCNT_X86 1
+#endif
+
+#define NBITS POSPOPCNT_NBITS
+
+static void pospopcnt_u32_scalar(const uint32_t *in, size_t n, uint64_t out[NBITS]) {
+    for (size_t i = 0; i < n; ++i) {
+        uint32_t w = in[i];
+        for (int b = 0; b < NBITS; ++b) {
+            out[b] += (w >> b) & 1;
+        }
+    }
+}
+
+static uint32_t signed_exponent_kernel(uint32_t Auint) {
+    const uint32_t sfmask = 0x807fffff;
+    const uint32_t emask = 0x7f800000;
+    const uint32_t esignmask = 0x40000000;
+    const uint32_t sbits = 23;
+    const int32_t bias = 127;
+
+    int32_t e = ((int32_t)((Auint & emask) >> sbits)) - bias;
+    uint32_t eabs = (uint32_t)(e < 0 ? -e : e);
+    uint32_t esign = (e < 0) ? esignmask : 0;
+
+    return (Auint & sfmask) | esign | (eabs << sbits);
+}
+
+/* NaN (exponent all ones and non-zero significand) or *missval; never
+ * missing if missval is NULL */
+static int is_missing(uint32_t w, const uint32_t *missval) {
+    return missval != NULL && ((w & 0x7fffffff) > 0x7f800000 || w == *missval);
+}
+
+/* Positional popcounts of the signed exponent transform t of in[i..n) and
+ * of pairs t[i] & t[i+1] for i < n - 1. Returns 1 if a missing value is
+ * found, 0 otherwise. */
+static int signed_exponent_pairs_scalar(const uint32_t *in, size_t i, size_t n, const uint32_t *missval,
+                                        uint64_t c_all[NBITS], uint64_t c11[NBITS]) {
+    for (; i < n; ++i) {
+        if (is_missing(in[i], missval)) return 1;
+        uint32_t t = signed_exponent_kernel(in[i]);
+        uint32_t pair = (i + 1 < n) ? t & signed_exponent_kernel(in[i + 1]) : 0;
+        for (int b = 0; b < NBITS; ++b) {
+            c_all[b] += (t >> b) & 1;
+            c11[b] += (pair >> b) & 1;
+        }
+    }
+    return 0;
+}
+
+#ifdef POSPOPCNT_X86
+
+/* Number of 16-vector blocks accumulated before the 32-bit lane counters
+ * are flushed to the 64-bit output (each block adds at most 1 per lane) */
+#define POSPOPCNT_FLUSH_BLOCKS 65536
+
+/* Harley-Seal accumulator: bit-sliced partial counts plus per-position
+ * lane counters of the sixteens */
+typedef struct {
+    __m256i ones;
+    __m256i twos;
+    __m256i fours;
+    __m256i eights;
+    __m256i counter[NBITS];
+} HarleySeal;
+
+/* Carry-save adder: (h, l) = a + b + c, bitwise */
+__attribute__((target("avx2")))
+static inline void csa_avx2(__m256i *h, __m256i *l, __m256i a, __m256i b, __m256i c) {
+    const __m256i u = _mm256_xor_si256(a, b);
+    *h = _mm256_or_si256(_mm256_and_si256(a, b), _mm256_and_si256(u, c));
+    *l = _mm256_xor_si256(u, c);
+}
+
+__attribute__((target("avx2")))
+static inline void hs_init(HarleySeal *hs) {
+    hs->ones = _mm256_setzero_si256();
+    hs->twos = _mm256_setzero_si256();
+    hs->fours = _mm256_setzero_si256();
+    hs->eights = _mm256_setzero_si256();
+    for (int b = 0; b < NBITS; ++b) {
+        hs->counter[b] = _mm256_setzero_si256();
+    }
+}
+
+/* Add 16 vectors (128 words) to the accumulator */
+__attribute__((target("avx2")))
+static inline void hs_add_block(HarleySeal *hs, const __m256i v[16]) {
+    const __m256i one = _mm256_set1_epi32(1);
+    __m256i sixteens, twosA, twosB, foursA, foursB, eightsA, eightsB;
+
+    csa_avx2(&twosA, &hs->ones, hs->ones, v[0], v[1]);
+    csa_avx2(&twosB, &hs->ones, hs->ones, v[2], v[3]);
+    csa_avx2(&foursA, &hs->twos, hs->twos, twosA, twosB);
+    csa_avx2(&twosA, &hs->ones, hs->ones, v[4], v[5]);
+    csa_avx2(&twosB, &hs->ones, hs->ones, v[6], v[7]);
+    csa_avx2(&foursB, &hs->twos, hs->twos, twosA, twosB);
+    csa_avx2(&eightsA, &hs->fours, hs->fours, foursA, foursB);
+    csa_avx2(&twosA, &hs->ones, hs->ones, v[8], v[9]);
+    csa_avx2(&twosB, &hs->ones, hs->ones, v[10], v[11]);
+    csa_avx2(&foursA, &hs->twos, hs->twos, twosA, twosB);
+    csa_avx2(&twosA, &hs->ones, hs->ones, v[12], v[13]);
+    csa_avx2(&twosB, &hs->ones, hs->ones, v[14], v[15]);
+    csa_avx2(&foursB, &hs->twos, hs->twos, twosA, twosB);
+    csa_avx2(&eightsB, &hs->fours, hs->fours, foursA, foursB);
+    csa_avx2(&sixteens, &hs->eights, hs->eights, eightsA, eightsB);
+
+    for (int b = 0; b < NBITS; ++b) {
+        hs->counter[b] = _mm256_add_epi32(hs->counter[b], _mm256_and_si256(sixteens, one));
+        sixteens = _mm256_srli_epi32(sixteens, 1);
+    }
+}
+
+/* Add weight * (bit b of every lane of v) to out[b] */
+__attribute__((target("avx2")))
+static void add_weighted_bits_avx2(__m256i v, uint64_t weight, uint64_t out[NBITS]) {
+    uint32_t lanes[8];
+    _mm256_storeu_si256((__m256i *)lanes, v);
+    for (int k = 0; k < 8; ++k) {
+        for (int b = 0; b < NBITS; ++b) {
+            out[b] += weight * ((lanes[k] >> b) & 1);
+        }
+    }
+}
+
+/* Move the lane counters (weight 16) to out and reset them */
+__attribute__((target("avx2")))
+static void hs_flush_counters(HarleySeal *hs, uint64_t out[NBITS]) {
+    for (int b = 0; b < NBITS; ++b) {
+        uint32_t lanes[8];
+        _mm256_storeu_si256((__m256i *)lanes, hs->counter[b]);
+        for (int k = 0; k < 8; ++k) {
+            out[b] += 16 * (uint64_t)lanes[k];
+        }
+        hs->counter[b] = _mm256_setzero_si256();
+    }
+}
+
+/* Flush everything left in the accumulator to out */
+__attribute__((target("avx2")))
+static void hs_finish(HarleySeal *hs, uint64_t out[NBITS]) {
+    hs_flush_counters(hs, out);
+    add_weighted_bits_avx2(hs->ones, 1, out);
+    add_weighted_bits_avx2(hs->twos, 2, out);
+    add_weighted_bits_avx2(hs->fours, 4, out);
+    add_weighted_bits_avx2(hs->eights, 8, out);
+}
+
+/* Harley-Seal positional popcount over blocks of 16 vectors (128 words).
+ * Returns the number of words processed; the tail is left to the caller. */
+__attribute__((target("avx2")))
+static size_t pospopcnt_u32_avx2(const uint32_t *in, size_t n, uint64_t out[NBITS]) {
+    const size_t nblocks = n / 128;
+    HarleySeal hs;
+    __m256i v[16];
+
+    hs_init(&hs);
+    for (size_t i = 0; i < nblocks; ++i) {
+        for (int k = 0; k < 16; ++k) {
+            v[k] = _mm256_loadu_si256((const __m256i *)(in + i * 128 + k * 8));
+        }
+        hs_add_block(&hs, v);
+        if ((i + 1) % POSPOPCNT_FLUSH_BLOCKS == 0) {
+            hs_flush_counters(&hs, out);
+        }
+    }
+    hs_finish(&hs, out);
+
+    return nblocks * 128;
+}
+
+/* Signed exponent transform of 8 words */
+__attribute__((target("avx2")))
+static inline __m256i signed_exponent_avx2(__m256i v) {
+    const __m256i sfmask = _mm256_set1_epi32((int)0x807fffff);
+    const __m256i esignmask = _mm256_set1_epi32(0x40000000);
+    const __m256i bias = _mm256_set1_epi32(127);
+    const __m256i exponent_bits = _mm256_set1_epi32(0xff);
+
+    __m256i e = _mm256_sub_epi32(_mm256_and_si256(_mm256_srli_epi32(v, 23), exponent_bits), bias);
+    __m256i esign = _mm256_and_si256(_mm256_cmpgt_epi32(_mm256_setzero_si256(), e), esignmask);
+    __m256i eabs = _mm256_slli_epi32(_mm256_abs_epi32(e), 23);
+
+    return _mm256_or_si256(_mm256_or_si256(_mm256_and_si256(v, sfmask), esign), eabs);
+}
+
+/* Fused missing value check, signed exponent transform and positional
+ * popcounts of t and of t[i] & t[i+1], in one pass. Blocks need one word of
+ * lookahead for the pairs, so only blocks with in[i + 128] available are
+ * processed. Unless missval is NULL, stops at the first block containing a
+ * NaN or *missval and sets *missing. Returns the number of words processed. */
+__attribute__((target("avx2")))
+static size_t signed_exponent_pairs_avx2(const uint32_t *in, size_t n, const uint32_t *missval,
+                                         uint64_t c_all[NBITS], uint64_t c11[NBITS], int *missing) {
+    const size_t nblocks = (n > 0) ? (n - 1) / 128 : 0;
+    const __m256i abs_mask = _mm256_set1_epi32(0x7fffffff);
+    const __m256i exponent_mask = _mm256_set1_epi32(0x7f800000);
+    const __m256i missv = _mm256_set1_epi32(missval != NULL ? (int)*missval : 0);
+    HarleySeal hs_all, hs_pairs;
+    __m256i t[16], pairs[16];
+
+    hs_init(&hs_all);
+    hs_init(&hs_pairs);
+    for (size_t i = 0; i < nblocks; ++i) {
+        const uint32_t *block = in + i * 128;
+        __m256i miss = _mm256_setzero_si256();
+        for (int k = 0; k < 16; ++k) {
+            __m256i cur = _mm256_loadu_si256((const __m256i *)(block + k * 8));
+            __m256i next = _mm256_loadu_si256((const __m256i *)(block + k * 8 + 1));
+            /* |w| > +inf as signed integers (|w| < 2^31) detects NaN */
+            __m256i is_nan = _mm256_cmpgt_epi32(_mm256_and_si256(cur, abs_mask), exponent_mask);
+            miss = _mm256_or_si256(miss, _mm256_or_si256(is_nan, _mm256_cmpeq_epi32(cur, missv)));
+            t[k] = signed_exponent_avx2(cur);
+            pairs[k] = _mm256_and_si256(t[k], signed_exponent_avx2(next));
+        }
+        if (missval != NULL && !_mm256_testz_si256(miss, miss)) {
+            *missing = 1;
+            return i * 128;
+        }
+        hs_add_block(&hs_all, t);
+        hs_add_block(&hs_pairs, pairs);
+        if ((i + 1) % POSPOPCNT_FLUSH_BLOCKS == 0) {
+            hs_flush_counters(&hs_all, c_all);
+            hs_flush_counters(&hs_pairs, c11);
+        }
+    }
+    hs_finish(&hs_all, c_all);
+    hs_finish(&hs_pairs, c11);
+
+    return nblocks * 128;
+}
+
+#endif
+
+void pospopcnt_u32(const uint32_t *in, size_t n, uint64_t out[NBITS]) {
+    size_t done = 0;
+#ifdef POSPOPCNT_X86
+    if (__builtin_cpu_supports("avx2")) {
+        done = pospopcnt_u32_avx2(in, n, out);
+    }
+#endif
+    pospopcnt_u32_scalar(in + done, n - done, out);
+}
+
+int signed_exponent_bitpair_count_u32(const uint32_t *in, size_t n, const uint32_t *missval,
+                                      uint64_t c11[NBITS], uint64_t c1x[NBITS], uint64_t cx1[NBITS]) {
+    uint64_t c_all[NBITS] = {0};
+    size_t done = 0;
+    int missing = 0;
+
+    if (n < 2) {
+        return n == 1 && is_missing(in[0], missval);
+    }
+
+#ifdef POSPOPCNT_X86
+    if (__builtin_cpu_supports("avx2")) {
+        done = signed_exponent_pairs_avx2(in, n, missval, c_all, c11, &missing);
+        if (missing) return 1;
+    }
+#endif
+    if (signed_exponent_pairs_scalar(in, done, n, missval, c_all, c11)) return 1;
+
+    /* First elements of the pairs are t[0..n-2], second elements t[1..n-1] */
+    uint32_t first = signed_exponent_kernel(in[0]);
+    uint32_t last = signed_exponent_kernel(in[n - 1]);
+    for (int b = 0; b < NBITS; ++b) {
+        c1x[b] += c_all[b] - ((last >> b) & 1);
+        cx1[b] += c_all[b] - ((first >> b) & 1);
+    }
+    return 0;
+}
@@ -0,0 +1,22 @@
+#ifndef POSPOPCNT_H
+#define POSPOPCNT_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+#define POSPOPCNT_NBITS 32
+
+/* Positional population count: out[b] += number of words with bit b set
+ * (b = 0 is the least significant bit). Uses AVX2 when available. */
+void pospopcnt_u32(const uint32_t *in, size_t n, uint64_t out[POSPOPCNT_NBITS]);
+
+/* Bit pair counts of consecutive elements of the signed exponent transform t
+ * of n float32 bit patterns, in one pass: c11[b] += pairs t[i] & t[i+1] with
+ * bit b set, c1x[b] / cx1[b] += first / second elements with bit b set.
+ * Unless missval is NULL, returns 1 as soon as a NaN or a word equal to
+ * *missval is found (the counts are then incomplete); returns 0 otherwise. */
+int signed_exponent_bitpair_count_u32(const uint32_t *in, size_t n, const uint32_t *missval,
+                                      uint64_t c11[POSPOPCNT_NBITS], uint64_t c1x[POSPOPCNT_NBITS],
+                                      uint64_t cx1[POSPOPCNT_NBITS]);
+
+#endif